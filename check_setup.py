@@ -13,28 +13,25 @@ def check_setup():
         print("✓ .env file found")
         
         # Load .env manually
-        with open(env_file, 'r') as f:
-            lines = f.readlines()
+        env_vars = dict(
+            line.strip().split('=', 1)
+            for line in env_file.read_text().splitlines()
+            if '=' in line and not line.lstrip().startswith('#')
+        )
         
-        env_vars = {}
-        for line in lines:
-            if '=' in line and not line.strip().startswith('#'):
-                key, value = line.strip().split('=', 1)
-                env_vars[key] = value
-        
-        # Check required variables
-        required_vars = ['TELEGRAM_API_ID', 'TELEGRAM_API_HASH']
-        for var in required_vars:
-            if var in env_vars and env_vars[var] not in ['', 'your_api_id_here', 'your_api_hash_here']:
-                print(f"✓ {var}: Set")
-            else:
-                print(f"✗ {var}: Missing or placeholder")
-        
-        # Check optional variables
-        optional_vars = ['TELEGRAM_GROUP', 'TELEGRAM_GROUP_ID', 'DAYS_BACK']
-        for var in optional_vars:
-            if var in env_vars:
-                print(f"• {var}: {env_vars[var]}")
+        # Check required and optional variables in one pass
+        placeholders = {None, '', 'your_api_id_here', 'your_api_hash_here'}
+        required = {'TELEGRAM_API_ID', 'TELEGRAM_API_HASH'}
+        all_vars = ('TELEGRAM_API_ID', 'TELEGRAM_API_HASH', 'TELEGRAM_GROUP', 'TELEGRAM_GROUP_ID', 'DAYS_BACK')
+        for var in all_vars:
+            value = env_vars.get(var)
+            if var in required:
+                if value not in placeholders:
+                    print(f"✓ {var}: Set")
+                else:
+                    print(f"✗ {var}: Missing or placeholder")
+            elif value is not None:
+                print(f"• {var}: {value}")
             else:
                 print(f"! {var}: Not set (will use default)")
                 
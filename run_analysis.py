@@ -0,0 +1,76 @@
+#!/usr/bin/env python3
+"""
+Run the full liquidation analysis pipeline
+
+Steps run in-process by default so pandas/numpy are imported once.
+Pass --isolated to run every step in its own Python subprocess instead.
+"""
+
+import sys
+import subprocess
+import traceback
+from pathlib import Path
+
+SRC_DIR = Path(__file__).parent / "src"
+sys.path.insert(0, str(SRC_DIR))
+
+import fetch_telegram
+import binance_fetch_price
+import parse_aggregate
+import build_dataset
+import analyze_correlation
+
+STEPS = [
+    (fetch_telegram.main, "Fetch Telegram liquidation messages"),
+    (binance_fetch_price.main, "Fetch BTC price data"),
+    (parse_aggregate.main, "Parse and aggregate liquidations"),
+    (build_dataset.main, "Build merged dataset"),
+    (analyze_correlation.main, "Analyze correlations"),
+]
+
+
+def run_step(fn, description: str) -> bool:
+    """Run one pipeline step in the current process"""
+    print(f"\n🔄 {description}...")
+    try:
+        fn()
+        return True
+    except Exception:
+        traceback.print_exc()
+        print(f"❌ {description} failed")
+        return False
+
+
+def run_step_isolated(fn, description: str) -> bool:
+    """Run one pipeline step in a fresh Python subprocess"""
+    print(f"\n🔄 {description} (isolated)...")
+    script_path = SRC_DIR / f"{fn.__module__}.py"
+    proc = subprocess.Popen(
+        [sys.executable, str(script_path)],
+        stdout=subprocess.PIPE, stderr=subprocess.STDOUT, text=True, bufsize=1,
+    )
+    for line in proc.stdout:
+        print(line, end="")
+    returncode = proc.wait()
+    if returncode != 0:
+        print(f"❌ {description} failed (exit code {returncode})")
+        return False
+    return True
+
+
+def main() -> None:
+    isolated = "--isolated" in sys.argv[1:]
+    runner = run_step_isolated if isolated else run_step
+
+    print("🚀 Starting Liquidation Analysis Pipeline")
+    print("=" * 50)
+
+    for fn, description in STEPS:
+        if not runner(fn, description):
+            sys.exit(1)
+
+    print("\n✅ Pipeline complete!")
+
+
+if __name__ == "__main__":
+    main()
@@ -2,6 +2,7 @@
 
 import os
 import sys
+import asyncio
 from pathlib import Path
 from datetime import datetime, timezone
 from dotenv import load_dotenv
@@ -17,23 +18,48 @@ API_HASH = os.getenv("TELEGRAM_API_HASH", "")
 SESSION = os.getenv("TELEGRAM_SESSION", ".telegram_session")
 KEYWORDS = os.getenv("SEARCH_KEYWORDS", "liquidation,rekt,whale,alert,bot,trading,crypto").lower().split(",")
 CHECK_MESSAGES = os.getenv("CHECK_RECENT_MESSAGES", "true").lower() == "true"
+MAX_CONCURRENT_CHECKS = 10
 
+_KEYWORDS = [kw.strip() for kw in KEYWORDS if kw.strip()]
+MIN_KW_LEN = min((len(kw) for kw in _KEYWORDS), default=0)
 
-def contains_keywords(text: str, keywords: list) -> list:
-    if not text:
+try:
+    import ahocorasick
+except ImportError:  # pyahocorasick is optional; fall back to per-keyword substring checks
+    ahocorasick = None
+
+_AUTOMATON = None
+if ahocorasick is not None and _KEYWORDS:
+    _AUTOMATON = ahocorasick.Automaton()
+    for kw in _KEYWORDS:
+        _AUTOMATON.add_word(kw, kw)
+    _AUTOMATON.make_automaton()
+
+
+def contains_keywords(text: str) -> list:
+    if not text or len(text) < MIN_KW_LEN:
+        return []
+    return contains_keywords_lc(text.lower())
+
+
+def contains_keywords_lc(text_lower: str) -> list:
+    """Same as contains_keywords, for text that is already lowercased"""
+    if not _KEYWORDS or len(text_lower) < MIN_KW_LEN:
         return []
-    text_lower = text.lower()
-    return [kw for kw in keywords if kw.strip() in text_lower]
+    if _AUTOMATON is None:
+        return [kw for kw in _KEYWORDS if kw in text_lower]
+    found = {kw for _, kw in _AUTOMATON.iter(text_lower)}
+    return [kw for kw in _KEYWORDS if kw in found]
 
 
-def check_recent_messages(client, entity, limit=10):
+async def check_recent_messages(client, entity, limit=10):
     try:
-        messages = client.get_messages(entity, limit=limit)
+        messages = await client.get_messages(entity, limit=limit)
         keyword_matches = []
         
         for msg in messages:
-            if msg.text:
-                matches = contains_keywords(msg.text, KEYWORDS)
+            if msg.text and len(msg.text) >= MIN_KW_LEN:
+                matches = contains_keywords_lc(msg.text.lower())
                 if matches:
                     keyword_matches.extend(matches)
         
@@ -42,7 +68,7 @@ def check_recent_messages(client, entity, limit=10):
         return []
 
 
-def main() -> None:
+async def main() -> None:
     if not API_ID or not API_HASH:
         raise RuntimeError("Set TELEGRAM_API_ID and TELEGRAM_API_HASH in .env")
 
@@ -50,10 +76,10 @@ def main() -> None:
     print(f"Keywords: {', '.join(KEYWORDS)}")
     print("=" * 70)
 
-    with make_client(API_ID, API_HASH, SESSION) as client:
-        dialogs = client.get_dialogs()
+    async with make_client(API_ID, API_HASH, SESSION) as client:
+        dialogs = await client.get_dialogs()
         
-        candidates = []
+        entries = []
         
         for dialog in dialogs:
             entity = dialog.entity
@@ -67,12 +93,24 @@ def main() -> None:
             participants = getattr(entity, 'participants_count', 'Unknown')
             
             # Check title for keywords
-            title_matches = contains_keywords(title, KEYWORDS)
-            
-            # Check recent messages if enabled
-            message_matches = []
-            if CHECK_MESSAGES:
-                message_matches = check_recent_messages(client, entity)
+            title_matches = contains_keywords(title)
+            entries.append((dialog, entity, title, entity_type, participants, title_matches))
+
+        # Check recent messages if enabled, fetching several dialogs concurrently
+        all_message_matches = [[] for _ in entries]
+        if CHECK_MESSAGES:
+            sem = asyncio.Semaphore(MAX_CONCURRENT_CHECKS)
+
+            async def bounded_check(entity):
+                async with sem:
+                    return await check_recent_messages(client, entity)
+
+            all_message_matches = await asyncio.gather(*(bounded_check(entry[1]) for entry in entries))
+
+        candidates = []
+        
+        for entry, message_matches in zip(entries, all_message_matches):
+            dialog, entity, title, entity_type, participants, title_matches = entry
             
             # If we found matches, add to candidates
             all_matches = list(set(title_matches + message_matches))
@@ -127,5 +165,9 @@ def main() -> None:
         print("   SEARCH_KEYWORDS=\"liquidation,rekt,whale,your_keywords\"")
 
 
+def run_main():
+    asyncio.run(main())
+
+
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    run_main()
\ No newline at end of file
@@ -15,6 +15,9 @@ API_ID = int(os.getenv("TELEGRAM_API_ID", "0"))
 API_HASH = os.getenv("TELEGRAM_API_HASH", "")
 SESSION = os.getenv("TELEGRAM_SESSION", ".telegram_session")
 
+# Lowercase title fragments that mark WhaleBot-style liquidation feeds
+WHALEBOT_SIGNATURES = ("whale", "rekt")
+
 
 async def main() -> None:
     if not API_ID or not API_HASH:
@@ -31,29 +34,22 @@ async def main() -> None:
         
         for dialog in dialogs:
             entity = dialog.entity
+            if not isinstance(entity, (Chat, Channel)):
+                continue
+            
+            title_lc = (entity.title or "").lower()
+            info = {
+                'title': entity.title,
+                'id': entity.id,
+                'participants': getattr(entity, 'participants_count', 'Unknown'),
+                'is_wbot': any(sig in title_lc for sig in WHALEBOT_SIGNATURES),
+            }
             
-            if isinstance(entity, Chat):
-                # Regular group
-                groups.append({
-                    'title': entity.title,
-                    'id': entity.id,
-                    'participants': getattr(entity, 'participants_count', 'Unknown')
-                })
-            elif isinstance(entity, Channel):
-                if entity.megagroup:
-                    # Supergroup
-                    groups.append({
-                        'title': entity.title,
-                        'id': entity.id,
-                        'participants': getattr(entity, 'participants_count', 'Unknown')
-                    })
-                else:
-                    # Channel
-                    channels.append({
-                        'title': entity.title,
-                        'id': entity.id,
-                        'participants': getattr(entity, 'participants_count', 'Unknown')
-                    })
+            # Regular groups and supergroups are groups; broadcast channels are channels
+            if isinstance(entity, Chat) or entity.megagroup:
+                groups.append(info)
+            else:
+                channels.append(info)
 
         # Print groups
         if groups:
@@ -65,8 +61,7 @@ async def main() -> None:
                 print(f"    Members: {group['participants']}")
                 print()
                 
-                # Highlight WhaleBot groups
-                if "whale" in group['title'].lower() or "rekt" in group['title'].lower():
+                if group['is_wbot']:
                     print(f"    ⭐ POTENTIAL MATCH for liquidation data!")
                     print()
 
@@ -80,8 +75,7 @@ async def main() -> None:
                 print(f"    Subscribers: {channel['participants']}")
                 print()
                 
-                # Highlight WhaleBot channels
-                if "whale" in channel['title'].lower() or "rekt" in channel['title'].lower():
+                if channel['is_wbot']:
                     print(f"    ⭐ POTENTIAL MATCH for liquidation data!")
                     print()
 
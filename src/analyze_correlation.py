@@ -5,26 +5,34 @@ from pathlib import Path
 import numpy as np
 import pandas as pd
 from dotenv import load_dotenv
+from utils.data_io import find_data, read_data, write_csv
 
 load_dotenv()
 
-DATASET_PATH = Path("data/processed/dataset.csv")
+DATASET_PATH = Path("data/processed/dataset")  # extension resolved in main()
 OUT_DIR = Path("data/processed")
 INTERVAL = os.getenv("AGG_INTERVAL", "1H").upper()
 
-def forward_return(close: pd.Series, k: int) -> pd.Series:
-    return (close.shift(-k) - close) / close
+def forward_return(close: np.ndarray, k: int) -> np.ndarray:
+    fwd = np.full_like(close, np.nan)
+    fwd[:-k] = (close[k:] - close[:-k]) / close[:-k]
+    return fwd
+
+def is_constant(arr: np.ndarray) -> bool:
+    arr = arr[~np.isnan(arr)]
+    return arr.size == 0 or not np.any(arr != arr[0])
 
 def main() -> None:
-    if not DATASET_PATH.exists():
-        raise FileNotFoundError(f"Missing input: {DATASET_PATH}")
+    dataset_path = find_data(DATASET_PATH)
+    if not dataset_path.exists():
+        raise FileNotFoundError(f"Missing input: {dataset_path}")
     OUT_DIR.mkdir(parents=True, exist_ok=True)
 
-    df = pd.read_csv(DATASET_PATH, parse_dates=["timestamp_utc"]).sort_values("timestamp_utc")
     needed = {
         "close", "ret_next", "long_liq_usd", "short_liq_usd",
         "net_liq_usd", "liq_total_usd", "long_count", "short_count"
     }
+    df = read_data(dataset_path, columns=sorted(needed | {"timestamp_utc"})).sort_values("timestamp_utc")
     missing = needed - set(df.columns)
     if missing:
         raise ValueError(f"dataset missing columns: {sorted(missing)}")
@@ -36,64 +44,67 @@ def main() -> None:
         "long_count", "short_count"
     ]
 
-    rows = []
-    for col in predictors:
-        s1, s2 = df[col], df[target]
-
-        mask = s1.notna() & s2.notna()
-        if mask.sum() == 0:
-            pearson = np.nan
-            spearman = np.nan
-        else:
-            pearson = s1[mask].corr(s2[mask], method="pearson")
-            spearman = s1[mask].corr(s2[mask], method="spearman")
-        rows.append({"predictor": col, "pearson": pearson, "spearman": spearman, "n": int(mask.sum())})
+    # Constant predictors (e.g. all-zero counts) have no correlation; skip them
+    varying = [col for col in predictors if not is_constant(df[col].to_numpy(dtype=np.float64))]
+    sub = df[varying + [target]]
+    pearson = sub.corr(method="pearson")[target]
+    # Spearman is Pearson on ranks; rank each column once instead of per pair
+    spearman = sub.rank().corr(method="pearson")[target]
+    n_pairs = (df[predictors].notna().to_numpy() & df[target].notna().to_numpy()[:, None]).sum(axis=0)
+
+    rows = [
+        {"predictor": col, "pearson": pearson.get(col, np.nan), "spearman": spearman.get(col, np.nan), "n": int(n)}
+        for col, n in zip(predictors, n_pairs)
+    ]
 
     corr_df = pd.DataFrame(rows).sort_values("predictor")
     corr_out = OUT_DIR / "correlation_summary.csv"
-    corr_df.to_csv(corr_out, index=False)
+    write_csv(corr_df, corr_out)
 
 
 
     horizons = [1, 3, 6, 12, 24] if INTERVAL == "1H" else [1, 2, 3, 5, 10]
 
 
-    def q95_nonzero(x: pd.Series) -> float:
-        x = x.fillna(0.0)
-        x = x[x > 0]
-        return float(x.quantile(0.95)) if len(x) else float("inf")
+    def q95_nonzero(arr: np.ndarray) -> float:
+        arr = arr[np.isfinite(arr) & (arr > 0)]
+        return float(np.quantile(arr, 0.95)) if arr.size else float("inf")
+
+    long_thr = q95_nonzero(df["long_liq_usd"].to_numpy(dtype=np.float64))
+    short_thr = q95_nonzero(df["short_liq_usd"].to_numpy(dtype=np.float64))
 
-    long_thr = q95_nonzero(df["long_liq_usd"])
-    short_thr = q95_nonzero(df["short_liq_usd"])
+    no_events = np.zeros(len(df), dtype=bool)
+    evt_long_spike = df["long_liq_usd"].to_numpy() >= long_thr if np.isfinite(long_thr) else no_events
+    evt_short_spike = df["short_liq_usd"].to_numpy() >= short_thr if np.isfinite(short_thr) else no_events
 
-    df["evt_long_spike"] = df["long_liq_usd"] >= long_thr if np.isfinite(long_thr) else False
-    df["evt_short_spike"] = df["short_liq_usd"] >= short_thr if np.isfinite(short_thr) else False
 
+    close = df["close"].to_numpy(dtype=np.float64)
+    fwd_by_k = {k: forward_return(close, k) for k in horizons}
 
-    def summarize_events(flag_col: str, label: str) -> list[dict]:
-        idx = df.index[df[flag_col].fillna(False)]
+    def summarize_events(flags: np.ndarray, label: str) -> list[dict]:
+        event_pos = np.flatnonzero(flags)
         results = []
         for k in horizons:
-            fwd = forward_return(df["close"], k)
-            vals = fwd.loc[idx].dropna()
+            vals = fwd_by_k[k][event_pos]
+            vals = vals[~np.isnan(vals)]
             if len(vals) == 0:
                 stats = {"label": label, "horizon_k": k, "n_events": 0,
                          "mean": np.nan, "median": np.nan, "hit_rate_pos": np.nan}
             else:
                 stats = {"label": label, "horizon_k": k, "n_events": int(len(vals)),
-                         "mean": float(vals.mean()), "median": float(vals.median()),
+                         "mean": float(vals.mean()), "median": float(np.median(vals)),
                          "hit_rate_pos": float((vals > 0).mean())}
             results.append(stats)
         return results
 
     ev_rows = []
-    ev_rows += summarize_events("evt_long_spike", "LONG_SPIKE")
-    ev_rows += summarize_events("evt_short_spike", "SHORT_SPIKE")
+    ev_rows += summarize_events(evt_long_spike, "LONG_SPIKE")
+    ev_rows += summarize_events(evt_short_spike, "SHORT_SPIKE")
 
     events_df = pd.DataFrame(ev_rows).sort_values(["label", "horizon_k"])
 
     events_out = OUT_DIR / "event_study_summary.csv"
-    events_df.to_csv(events_out, index=False)
+    write_csv(events_df, events_out)
 
 
     print(f"Saved: {corr_out} and {events_out}")
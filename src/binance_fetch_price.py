@@ -1,16 +1,22 @@
 #!/usr/bin/env python3
 
 import os
-import time
+import asyncio
 from datetime import datetime, timedelta, timezone
 from pathlib import Path
-import requests
+import httpx
+import numpy as np
 import pandas as pd
 from dotenv import load_dotenv
+from utils.data_io import data_path, find_data, read_data, write_data
 
 load_dotenv()
 
 API_URL = "https://api.binance.com/api/v3/klines"
+PAGE_LIMIT = 1000
+MAX_CONCURRENCY = 4
+INTERVAL_MS = {"1h": 3_600_000, "1d": 86_400_000}
+_AGG_MAP = {"1H": "1h", "1D": "1d"}
 
 def _parse_dt(s: str | None, fallback: datetime) -> datetime:
     if not s:
@@ -20,57 +26,72 @@ def _parse_dt(s: str | None, fallback: datetime) -> datetime:
     return dt.astimezone(timezone.utc) if dt.tzinfo else dt.replace(tzinfo=timezone.utc)
 
 def _interval_binance(agg: str) -> str:
-    agg = (agg or "1H").upper()
-    if agg == "1H":
-        return "1h"
-    if agg == "1D":
-        return "1d"
-    raise ValueError("AGG_INTERVAL must be 1H or 1D")
-
-def fetch_binance_klines(symbol: str, start_utc: datetime, end_utc: datetime, interval: str) -> pd.DataFrame:
-    start_ms = int(start_utc.timestamp() * 1000)
-    end_ms = int(end_utc.timestamp() * 1000)
-
-    all_chunks: list[pd.DataFrame] = []
-    params_base = {"symbol": symbol, "interval": interval, "limit": 1000}
+    try:
+        return _AGG_MAP[(agg or "1H").upper()]
+    except KeyError:
+        raise ValueError("AGG_INTERVAL must be 1H or 1D") from None
 
-    while start_ms < end_ms:
-        params = dict(params_base, startTime=start_ms, endTime=end_ms)
+async def _get_klines(client: httpx.AsyncClient, sem: asyncio.Semaphore, params: dict) -> list:
+    async with sem:
         for attempt in range(3):
             try:
-                r = requests.get(API_URL, params=params, timeout=30)
+                r = await client.get(API_URL, params=params)
                 r.raise_for_status()
-                rows = r.json()
-                break
-            except requests.RequestException:
+                return r.json()
+            except httpx.HTTPError:
                 if attempt == 2:
                     raise
-                time.sleep(0.5 + attempt)
-        if not rows:
-            break
-
-        df = pd.DataFrame(
-            rows,
-            columns=[
-                "open_time","open","high","low","close","volume",
-                "close_time","quote_asset_volume","number_of_trades",
-                "taker_buy_base","taker_buy_quote","ignore",
-            ],
-        )
-        df = df.astype({"open":"float64","high":"float64","low":"float64","close":"float64","volume":"float64"})
-        df["timestamp_utc"] = pd.to_datetime(df["close_time"], unit="ms", utc=True)
-        all_chunks.append(df[["timestamp_utc","open","high","low","close","volume"]])
+                await asyncio.sleep(0.5 * 2 ** attempt)
 
-        start_ms = int(rows[-1][6]) + 1
-        time.sleep(0.2)
+async def fetch_binance_klines(symbol: str, start_utc: datetime, end_utc: datetime, interval: str) -> pd.DataFrame:
+    start_ms = int(start_utc.timestamp() * 1000)
+    end_ms = int(end_utc.timestamp() * 1000)
 
-    if not all_chunks:
+    # Each window holds at most one page of klines, so pages can be fetched concurrently
+    page_ms = INTERVAL_MS[interval] * PAGE_LIMIT
+    windows = [(t, min(t + page_ms - 1, end_ms)) for t in range(start_ms, end_ms, page_ms)]
+    params_base = {"symbol": symbol, "interval": interval, "limit": PAGE_LIMIT}
+
+    sem = asyncio.Semaphore(MAX_CONCURRENCY)
+    # One pooled client for every page: keep-alive connections are reused across requests
+    limits = httpx.Limits(max_connections=MAX_CONCURRENCY, max_keepalive_connections=MAX_CONCURRENCY)
+    transport = httpx.AsyncHTTPTransport(retries=3, limits=limits)
+    async with httpx.AsyncClient(transport=transport, timeout=30) as client:
+        pages = await asyncio.gather(*(
+            _get_klines(client, sem, dict(params_base, startTime=a, endTime=b))
+            for a, b in windows
+        ))
+
+    all_rows = [row for rows in pages for row in rows]
+    if not all_rows:
         return pd.DataFrame(columns=["timestamp_utc","open","high","low","close","volume"])
 
-    out = pd.concat(all_chunks, ignore_index=True).drop_duplicates(subset=["timestamp_utc"])
+    # Columns 1-5 are open/high/low/close/volume, column 6 is close_time (ms)
+    arr = np.asarray(all_rows, dtype=object)
+    nums = arr[:, 1:6].astype(np.float64)
+    out = pd.DataFrame({
+        "timestamp_utc": pd.to_datetime(arr[:, 6].astype(np.int64), unit="ms", utc=True),
+        "open": nums[:, 0],
+        "high": nums[:, 1],
+        "low": nums[:, 2],
+        "close": nums[:, 3],
+        "volume": nums[:, 4],
+    }).drop_duplicates(subset=["timestamp_utc"])
     out.sort_values("timestamp_utc", inplace=True)
     return out
 
+def _load_previous(path: Path, interval: str) -> pd.DataFrame | None:
+    """Load previously saved klines if they were fetched at the same interval"""
+    if not path.exists():
+        return None
+    prev = read_data(path)
+    if len(prev) < 2:
+        return None
+    step = prev["timestamp_utc"].iloc[-1] - prev["timestamp_utc"].iloc[-2]
+    if step != pd.Timedelta(milliseconds=INTERVAL_MS[interval]):
+        return None
+    return prev
+
 def main():
     symbol = os.getenv("BINANCE_SYMBOL", "BTCUSDT").upper()
     agg_interval = os.getenv("AGG_INTERVAL", "1H").upper()
@@ -81,13 +102,31 @@ def main():
     start_utc = _parse_dt(os.getenv("START_DATETIME"), default_start)
     end_utc = _parse_dt(os.getenv("END_DATETIME"), now_utc)
 
-    df = fetch_binance_klines(symbol, start_utc, end_utc, interval)
-
     out_dir = Path("data/raw")
     out_dir.mkdir(parents=True, exist_ok=True)
-    out_path = out_dir / "btc_price.csv"
-    df.to_csv(out_path, index=False)
-    print(f"saved {out_path} (rows={len(df)}, symbol={symbol}, interval={agg_interval})")
+    out_path = data_path(out_dir / "btc_price")
+
+    # Only fetch klines after the ones already on disk. The last saved kline is
+    # re-fetched because it may have been saved while still open.
+    prev = _load_previous(find_data(out_dir / "btc_price"), interval)
+    if prev is not None:
+        last_open = prev["timestamp_utc"].max() - pd.Timedelta(milliseconds=INTERVAL_MS[interval] - 1)
+        start_utc = max(start_utc, last_open.to_pydatetime())
+
+    df = asyncio.run(fetch_binance_klines(symbol, start_utc, end_utc, interval))
+    fetched = len(df)
+
+    if prev is not None and fetched:
+        df = (
+            pd.concat([prev, df], ignore_index=True)
+            .drop_duplicates(subset=["timestamp_utc"], keep="last")
+            .sort_values("timestamp_utc")
+        )
+    elif prev is not None:
+        df = prev
+
+    write_data(df, out_path)
+    print(f"saved {out_path} (rows={len(df)}, new={fetched}, symbol={symbol}, interval={agg_interval})")
 
 if __name__ == "__main__":
     main()
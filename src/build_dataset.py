@@ -2,63 +2,81 @@
 
 import os
 from pathlib import Path
-import pandas as pd
+import numpy as np
 from dotenv import load_dotenv
+from utils.data_io import data_path, find_data, read_data, write_data
 
 load_dotenv()
 
 INTERVAL = os.getenv("AGG_INTERVAL", "1H").upper()
-RULE = "1H" if INTERVAL == "1H" else "1D" if INTERVAL == "1D" else None
+_AGG_RULES = {"1H": "1H", "1D": "1D"}
+RULE = _AGG_RULES.get(INTERVAL)
 
-LIQS_PATH = Path(f"data/processed/liqs_{RULE}.csv") if RULE else None
-PRICE_PATH = Path("data/raw/btc_price.csv")
-OUT_PATH = Path("data/processed/dataset.csv")
+# Input extensions are resolved in main(): an earlier pipeline step may write them
+LIQS_PATH = Path(f"data/processed/liqs_{RULE}") if RULE else None
+PRICE_PATH = Path("data/raw/btc_price")
+OUT_PATH = data_path(Path("data/processed/dataset"))
 
 
 def main() -> None:
     if RULE is None:
         raise ValueError("AGG_INTERVAL must be 1H or 1D")
 
-    if not LIQS_PATH or not LIQS_PATH.exists():
-        raise FileNotFoundError(f"Missing input: {LIQS_PATH}")
-    if not PRICE_PATH.exists():
-        raise FileNotFoundError(f"Missing input: {PRICE_PATH}")
+    liqs_path = find_data(LIQS_PATH)
+    price_path = find_data(PRICE_PATH)
+    if not liqs_path.exists():
+        raise FileNotFoundError(f"Missing input: {liqs_path}")
+    if not price_path.exists():
+        raise FileNotFoundError(f"Missing input: {price_path}")
 
 
-    liq = pd.read_csv(LIQS_PATH, parse_dates=["timestamp_utc"])
-    px = pd.read_csv(PRICE_PATH, parse_dates=["timestamp_utc"])
+    liq = read_data(liqs_path)
+    px = read_data(price_path)
 
 
-    px = px.sort_values("timestamp_utc")[["timestamp_utc", "close", "volume"]]
+    liq = liq.set_index("timestamp_utc").sort_index()
+    px = px.set_index("timestamp_utc").sort_index()[["close", "volume"]]
+    # Klines are stamped at close time (xx:59:59.999); floor to the bin start so
+    # each liquidation bin joins the candle covering the same period
+    px.index = px.index.floor(RULE.lower())  # "1h"/"1d"; the uppercase aliases are deprecated
 
 
-    df = pd.merge(liq.sort_values("timestamp_utc"), px, on="timestamp_utc", how="inner")
+    df = liq.join(px, how="inner").reset_index()
 
     if df.empty:
         OUT_PATH.parent.mkdir(parents=True, exist_ok=True)
-        df.to_csv(OUT_PATH, index=False)
+        write_data(df, OUT_PATH)
         print(f"saved {OUT_PATH} (rows=0)")
         return
 
 
-    df = df.sort_values("timestamp_utc").reset_index(drop=True)
+    short = df["short_liq_usd"].to_numpy(dtype=np.float64)
+    long = df["long_liq_usd"].to_numpy(dtype=np.float64)
+    close = df["close"].to_numpy(dtype=np.float64)
 
+    close_prev = np.empty_like(close)
+    close_prev[0] = np.nan
+    close_prev[1:] = close[:-1]
+    close_next = np.empty_like(close)
+    close_next[-1] = np.nan
+    close_next[:-1] = close[1:]
 
-    df["net_liq_usd"] = df["short_liq_usd"] - df["long_liq_usd"]
-    df["liq_total_usd"] = df["short_liq_usd"] + df["long_liq_usd"]
+    df = df.assign(
+        net_liq_usd=short - long,
+        liq_total_usd=short + long,
+        close_prev=close_prev,
+        ret=(close - close_prev) / close_prev,
+        close_next=close_next,
+        ret_next=(close_next - close) / close,
+    )
 
 
-    df["close_prev"] = df["close"].shift(1)
-    df["ret"] = (df["close"] - df["close_prev"]) / df["close_prev"]
-    df["close_next"] = df["close"].shift(-1)
-    df["ret_next"] = (df["close_next"] - df["close"]) / df["close"]
-
-
-    df = df.dropna(subset=["ret", "ret_next"]).reset_index(drop=True)
+    # First row has no previous close and last row has no next close
+    df = df.iloc[1:-1].reset_index(drop=True)
 
 
     OUT_PATH.parent.mkdir(parents=True, exist_ok=True)
-    df.to_csv(OUT_PATH, index=False)
+    write_data(df, OUT_PATH)
     print(f"saved {OUT_PATH} (rows={len(df)}, interval={RULE})")
 
 
@@ -5,21 +5,25 @@ fetch_telegram.py
 Notebook-first Telegram fetcher for liquidation messages.
 
 - Date window is provided by the caller (start_dt, end_dt). No .env dependency for dates.
-- Iterates messages chronologically (oldest -> newest) starting at start_dt, stops after end_dt.
-- Case-insensitive substring filter (default: "Liquidated").
+- Splits the window into sub-windows fetched concurrently; each iterates oldest -> newest.
+- Case-insensitive substring filter (default: "Liquidated"), also sent to Telegram as a server-side search.
 - Returns a pandas DataFrame (message_id, timestamp_utc, text).
-- Optionally saves CSV to data/raw/telegram_messages.csv.
+- Optionally saves CSV to data/raw/telegram_messages.csv; with append=True it resumes
+  after the last saved message_id and appends to the existing file.
 """
 
 import os
+import re
 import asyncio
 from datetime import datetime, timezone, timedelta
 from pathlib import Path
 from typing import Optional
 
+import numpy as np
 import pandas as pd
 from dotenv import load_dotenv
-from telethon.errors import ChannelPrivateError, ChatAdminRequiredError
+from telethon.errors import ChannelPrivateError, ChatAdminRequiredError, FloodWaitError
+from utils.data_io import write_csv
 from utils.telethon_client import make_client
 
 load_dotenv()
@@ -32,6 +36,28 @@ GROUP_ENV = os.getenv("TELEGRAM_GROUP", "@WhaleBotRektd")
 GROUP_ID_ENV = os.getenv("TELEGRAM_GROUP_ID")  # numeric string OK
 
 DEFAULT_OUT_PATH = Path("data/raw/telegram_messages.csv")
+CSV_TAIL_BYTES = 64 * 1024  # comfortably more than one row (Telegram caps messages at 4096 chars)
+FETCH_WINDOWS = 4
+_NEWLINES_TO_SPACE = str.maketrans({"\r": " ", "\n": " "})
+MAX_CONCURRENT_WINDOWS = 4
+
+
+def _last_saved(path: Path) -> Optional[tuple[int, datetime]]:
+    """(message_id, timestamp) of the last row of an existing CSV, read from the file tail only"""
+    if not path.exists():
+        return None
+    with open(path, "rb") as f:
+        f.seek(0, os.SEEK_END)
+        f.seek(max(0, f.tell() - CSV_TAIL_BYTES))
+        tail = f.read()
+    last_line = tail.rstrip(b"\r\n").rsplit(b"\n", 1)[-1]
+    fields = last_line.split(b",", 2)
+    try:
+        message_id = int(fields[0])
+    except ValueError:  # empty file or header only
+        return None
+    ts = pd.Timestamp(fields[1].decode("utf-8").strip('"'))
+    return message_id, _to_utc(ts.to_pydatetime())
 
 
 def _to_utc(dt: datetime) -> datetime:
@@ -55,6 +81,79 @@ async def _resolve_entity(client, channel: Optional[str], channel_id: Optional[i
     raise RuntimeError(f"Could not resolve Telegram channel. Last error: {last_err}")
 
 
+async def _fetch_window(
+    client,
+    entity,
+    start_utc: datetime,
+    end_utc: datetime,
+    substr_filter: Optional[str],
+    needle_re: Optional[re.Pattern],
+    hard_limit: Optional[int],
+    min_id: int,
+    sem: asyncio.Semaphore,
+) -> tuple[list[int], list[int], list[str]]:
+    """
+    Fetch matching messages in [start_utc, end_utc] as (ids, timestamps in ns, texts).
+    Only messages with an id above min_id are considered.
+    """
+    ids: list[int] = []
+    ts_ns: list[int] = []
+    texts: list[str] = []
+    # Loop-invariant lookups bound to locals for the per-message loop
+    utc = timezone.utc
+    search = needle_re.search if needle_re else None
+    add_id, add_ts, add_text = ids.append, ts_ns.append, texts.append
+    window_start_id = None
+
+    async with sem:
+        while True:
+            try:
+                # A search request treats offset_date as max_date, which breaks reverse
+                # iteration; start from the id of the last message before the window instead
+                if window_start_id is None:
+                    before = await client.get_messages(entity, offset_date=start_utc, limit=1)
+                    window_start_id = before[0].id if before else 0
+                    min_id = max(min_id, window_start_id)
+
+                # reverse=True => oldest→newest, starting after min_id
+                # search= filters server-side; Telegram matches words, so the substring check below stays
+                async for msg in client.iter_messages(
+                    entity, reverse=True, search=substr_filter or None, min_id=min_id
+                ):
+                    # Resume point if a flood wait interrupts the iteration
+                    min_id = max(min_id, msg.id)
+                    if not getattr(msg, "date", None) or not getattr(msg, "text", None):
+                        continue
+
+                    ts = msg.date
+                    if ts.tzinfo is None:
+                        ts = ts.replace(tzinfo=utc)
+                    ts_utc = ts.astimezone(utc)
+
+                    if ts_utc > end_utc:
+                        break
+                    if ts_utc < start_utc:
+                        continue
+
+                    # Filter on the raw text; only kept messages pay for the cleanup
+                    raw = msg.text
+                    if search and not search(raw):
+                        continue
+
+                    add_id(int(msg.id))
+                    add_ts(int(ts_utc.timestamp()) * 1_000_000_000)
+                    add_text(raw.strip().translate(_NEWLINES_TO_SPACE))
+
+                    if hard_limit and len(ids) >= hard_limit:
+                        break
+                break
+            except FloodWaitError as e:
+                # Wait out the flood limit, then resume after the last message seen
+                await asyncio.sleep(e.seconds)
+
+    return ids, ts_ns, texts
+
+
 async def fetch_telegram_messages(
     start_dt: datetime,
     end_dt: datetime,
@@ -67,11 +166,16 @@ async def fetch_telegram_messages(
     substr_filter: Optional[str] = "Liquidated",
     out_path: Path = DEFAULT_OUT_PATH,
     save_csv: bool = True,
+    append: bool = False,
     hard_limit: Optional[int] = None,
+    windows: int = FETCH_WINDOWS,
 ) -> pd.DataFrame:
     """
     Fetch Telegram messages within [start_dt, end_dt] inclusive.
-    Returns DataFrame: message_id, timestamp_utc, text
+    The range is split into `windows` sub-ranges that are fetched concurrently.
+    With append=True only messages newer than the last message_id in out_path are
+    fetched, and they are appended to it instead of rewriting the file.
+    Returns DataFrame: message_id, timestamp_utc, text (new messages only when appending)
     """
     api_id = api_id or (int(API_ID_ENV) if API_ID_ENV else None)
     api_hash = api_hash or API_HASH_ENV
@@ -89,53 +193,55 @@ async def fetch_telegram_messages(
 
     out_path.parent.mkdir(parents=True, exist_ok=True)
 
-    rows = []
+    needle_re = re.compile(re.escape(substr_filter), re.IGNORECASE) if substr_filter else None
+    last = _last_saved(out_path) if append else None
+    last_id = 0
+    if last is not None:
+        # Everything up to the last saved message is on disk; only split what is left
+        last_id, last_ts = last
+        start_utc = max(start_utc, last_ts.replace(microsecond=0))
+        print(f"Resuming after message_id {last_id} ({last_ts}) from {out_path}")
+
+    # Split [start_utc, end_utc] into disjoint, second-aligned windows fetched concurrently
+    n_windows = max(1, windows)
+    step = (end_utc - start_utc) / n_windows
+    edges = [(start_utc + step * i).replace(microsecond=0) for i in range(n_windows)] + [end_utc]
+    bounds = [
+        (a, b if i == n_windows - 1 else b - timedelta(seconds=1))
+        for i, (a, b) in enumerate(zip(edges[:-1], edges[1:]))
+    ]
+    bounds = [(a, b) for a, b in bounds if a <= b]
 
     async with make_client(api_id, api_hash, session_path) as client:
         entity = await _resolve_entity(client, channel, channel_id)
+        sem = asyncio.Semaphore(MAX_CONCURRENT_WINDOWS)
 
         try:
-            # reverse=True => oldest→newest; offset_date=start_utc => start cursor
-            async for msg in client.iter_messages(entity, offset_date=start_utc, reverse=True):
-                if not getattr(msg, "date", None) or not getattr(msg, "text", None):
-                    continue
-
-                ts = msg.date
-                if ts.tzinfo is None:
-                    ts = ts.replace(tzinfo=timezone.utc)
-                ts_utc = ts.astimezone(timezone.utc)
-
-                if ts_utc > end_utc:
-                    break
-                if ts_utc < start_utc:
-                    continue
-
-                text = (msg.text or "").strip()
-                if substr_filter and substr_filter.lower() not in text.lower():
-                    continue
-
-                rows.append((
-                    int(msg.id),
-                    ts_utc.isoformat(timespec="seconds"),
-                    text.replace("\r", " ").replace("\n", " "),
-                ))
-
-                if hard_limit and len(rows) >= hard_limit:
-                    break
-
+            results = await asyncio.gather(*(
+                _fetch_window(client, entity, a, b, substr_filter, needle_re, hard_limit, last_id, sem)
+                for a, b in bounds
+            ))
         except (ChannelPrivateError, ChatAdminRequiredError) as e:
             raise RuntimeError(
                 "Channel is private or requires admin privileges. "
                 "Ensure your account can read this channel."
             ) from e
 
-    df = pd.DataFrame(rows, columns=["message_id", "timestamp_utc", "text"])
-    if not df.empty:
-        df["timestamp_utc"] = pd.to_datetime(df["timestamp_utc"], utc=True)
-        df = df.sort_values("timestamp_utc").reset_index(drop=True)
+    # Windows are in chronological order, so concatenating them keeps rows sorted
+    ids = [i for r in results for i in r[0]]
+    ts_ns = [t for r in results for t in r[1]]
+    texts = [t for r in results for t in r[2]]
+    if hard_limit:
+        ids, ts_ns, texts = ids[:hard_limit], ts_ns[:hard_limit], texts[:hard_limit]
+
+    df = pd.DataFrame({
+        "message_id": np.asarray(ids, dtype=np.int64),
+        "timestamp_utc": pd.to_datetime(np.asarray(ts_ns, dtype=np.int64), unit="ns", utc=True),
+        "text": texts,
+    })
 
     if save_csv:
-        df.to_csv(out_path, index=False)
+        write_csv(df, out_path, append=append)
 
     print(f"Fetched {len(df)} liquidation messages from {channel or channel_id} "
           f"between {start_utc} and {end_utc}. Saved: {save_csv} -> {out_path}")
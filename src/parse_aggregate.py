@@ -5,6 +5,7 @@ import re
 from pathlib import Path
 import pandas as pd
 from dotenv import load_dotenv
+from utils.data_io import data_path, read_messages, write_data
 
 load_dotenv()
 
@@ -13,28 +14,76 @@ OUT_DIR = Path("data/processed")
 INTERVAL = os.getenv("AGG_INTERVAL", "1H").upper()
 SYMBOL_FILTER = os.getenv("SYMBOL_FILTER", "BTC") 
 
-SIDE_RE   = re.compile(r"\bLiquidated\s+(Long|Short)\b", re.I)
-AMOUNT_RE = re.compile(r":\s*(?:Buy|Sell)\s*\$([\d,]+(?:\.\d+)?)")
-SYMBOL_RE = re.compile(r"\bon\s+([A-Z0-9_\-/:]+)\s+at\b", re.I) 
+SIDES = ["long", "short"]
+
+# side, optional symbol and amount in one pass; Buy/Sell stays case-sensitive as before
+COMBO_RE = re.compile(
+    r"\bLiquidated\s+(?P<side>Long|Short)\b"
+    r"(?:.*?\bon\s+(?P<symbol>[A-Z0-9_\-/:]+)\s+at\b)?"
+    r".*?:\s*(?-i:Buy|Sell)\s*\$(?P<amount>[\d,]+(?:\.\d+)?)",
+    re.I | re.S,
+)
 
 
 def parse_row(text: str) -> tuple[str | None, float | None, str | None]:
     if not text:
         return None, None, None
 
-    side_m = SIDE_RE.search(text)
-    if not side_m:
-        return None, None, None
-    side = side_m.group(1).lower()
-
-    amt_m = AMOUNT_RE.search(text)
-    if not amt_m:
+    m = COMBO_RE.search(text)
+    if not m:
         return None, None, None
-    amount_usd = float(amt_m.group(1).replace(",", ""))
+    return m["side"].lower(), float(m["amount"].replace(",", "")), m["symbol"]
+
+
+def parse_texts(text: pd.Series) -> pd.DataFrame:
+    """Vectorized parse_row: returns side, amount_usd and symbol columns aligned with text"""
+    m = text.str.extract(COMBO_RE)
+    return pd.DataFrame({
+        "side": pd.Categorical(m["side"].str.lower(), categories=SIDES),
+        "amount_usd": m["amount"].str.replace(",", "", regex=False).astype("float64"),
+        "symbol": m["symbol"],
+    })
+
+
+def extract_liquidations(msg_df: pd.DataFrame, symbol_filter: str | None = None) -> pd.DataFrame:
+    """
+    Parse raw messages (timestamp_utc, text) into valid liquidations indexed by timestamp.
+    timestamp_utc must already be parsed to datetimes (see utils.data_io.read_messages).
+    When symbol_filter is set, only messages containing it (case-insensitive) are kept.
+    """
+    df = msg_df.join(parse_texts(msg_df["text"])).dropna(subset=["side", "amount_usd"])
+    if symbol_filter:
+        df = df[df["text"].str.contains(symbol_filter, case=False, regex=False, na=False)]
+
+    return df.dropna(subset=["timestamp_utc"]).set_index("timestamp_utc").sort_index()
+
+
+def aggregate_by_side(liq: pd.DataFrame, rule: str) -> pd.DataFrame:
+    """
+    Sum and count liquidations per side over `rule` bins.
+    `liq` must be indexed by timestamp and have 'side' and 'amount_usd' columns.
+    """
+    columns = ["timestamp_utc", "long_liq_usd", "short_liq_usd", "long_count", "short_count"]
+    if liq.empty:
+        return pd.DataFrame(columns=columns)
+
+    g = (
+        liq.groupby([pd.Grouper(freq=rule), "side"], observed=True)["amount_usd"]
+        .agg(["sum", "count"])
+        .unstack("side", fill_value=0)
+        .reindex(columns=pd.MultiIndex.from_product([["sum", "count"], SIDES]), fill_value=0)
+    )
+    # groupby only yields observed bins; restore the empty ones resample would produce
+    g = g.reindex(pd.date_range(g.index.min(), g.index.max(), freq=rule), fill_value=0)
 
-    sym_m = SYMBOL_RE.search(text)
-    symbol = sym_m.group(1) if sym_m else None
-    return side, amount_usd, symbol
+    out = pd.DataFrame({
+        "long_liq_usd": g[("sum", "long")],
+        "short_liq_usd": g[("sum", "short")],
+        "long_count": g[("count", "long")],
+        "short_count": g[("count", "short")],
+    })
+    out.index.name = "timestamp_utc"
+    return out.reset_index()[columns]
 
 
 def main() -> None:
@@ -43,53 +92,29 @@ def main() -> None:
 
     OUT_DIR.mkdir(parents=True, exist_ok=True)
 
-    df = pd.read_csv(RAW_PATH)
+    df = read_messages(RAW_PATH)
     if "timestamp_utc" not in df.columns or "text" not in df.columns:
         raise ValueError("Input must contain 'timestamp_utc' and 'text' columns")
 
 
-    parsed = df["text"].apply(parse_row)
-    df["side"] = parsed.apply(lambda x: x[0])
-    df["amount_usd"] = parsed.apply(lambda x: x[1])
-    df["symbol"] = parsed.apply(lambda x: x[2])
-
-    df = df.dropna(subset=["side", "amount_usd"])
-
-    if SYMBOL_FILTER:
-        df = df[df["text"].str.contains(SYMBOL_FILTER, case=False, na=False)]
+    df = extract_liquidations(df, SYMBOL_FILTER)
 
     if df.empty:
-        out_path = OUT_DIR / f"liqs_{INTERVAL}.csv"
-        pd.DataFrame(
+        out_path = data_path(OUT_DIR / f"liqs_{INTERVAL}")
+        write_data(pd.DataFrame(
             columns=["timestamp_utc", "long_liq_usd", "short_liq_usd", "long_count", "short_count"]
-        ).to_csv(out_path, index=False)
+        ), out_path)
         print(f"saved {out_path} (rows=0)")
         return
 
-    df["timestamp_utc"] = pd.to_datetime(df["timestamp_utc"], utc=True, errors="coerce")
-    df = df.dropna(subset=["timestamp_utc"]).set_index("timestamp_utc").sort_index()
-
     rule = "1H" if INTERVAL == "1H" else "1D" if INTERVAL == "1D" else None
     if rule is None:
         raise ValueError("AGG_INTERVAL must be 1H or 1D")
 
-    longs_usd = df[df["side"] == "long"].resample(rule)["amount_usd"].sum()
-    shorts_usd = df[df["side"] == "short"].resample(rule)["amount_usd"].sum()
-
-    longs_cnt = df[df["side"] == "long"].resample(rule)["side"].count()
-    shorts_cnt = df[df["side"] == "short"].resample(rule)["side"].count()
-
-    out = pd.DataFrame({
-        "long_liq_usd": longs_usd,
-        "short_liq_usd": shorts_usd,
-        "long_count": longs_cnt,
-        "short_count": shorts_cnt,
-    }).fillna(0.0).reset_index()
-
-    out.rename(columns={"timestamp_utc": "timestamp_utc"}, inplace=True)
+    out = aggregate_by_side(df, rule)
 
-    out_path = OUT_DIR / f"liqs_{rule}.csv"
-    out.to_csv(out_path, index=False)
+    out_path = data_path(OUT_DIR / f"liqs_{rule}")
+    write_data(out, out_path)
     print(f"saved {out_path} (rows={len(out)})")
 
 
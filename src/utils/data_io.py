@@ -0,0 +1,93 @@
+import os
+from pathlib import Path
+
+import pandas as pd
+
+try:
+    import pyarrow as pa
+    from pyarrow import csv as pacsv
+    from pyarrow import parquet as pq
+except ImportError:  # pyarrow is optional; fall back to the pandas writer
+    pa = None
+    pacsv = None
+    pq = None
+
+# Format for intermediate pipeline files (prices, aggregated liquidations, dataset)
+DATA_EXT = os.getenv("DATA_EXT", "parquet" if pa is not None else "csv").lower()
+
+# Column types of the raw Telegram messages CSV written by fetch_telegram
+MESSAGE_DTYPES = {"message_id": "int64", "text": "string"}
+
+
+def data_path(path: Path) -> Path:
+    """Return path with the extension of the configured intermediate format"""
+    return path.with_suffix(f".{DATA_EXT}")
+
+
+def find_data(path: Path) -> Path:
+    """Path to read an intermediate file from, falling back to a legacy .csv
+
+    Files written before the format became configurable are plain CSV; use one
+    when the configured format's file does not exist yet.
+    """
+    preferred = data_path(path)
+    if not preferred.exists():
+        legacy = path.with_suffix(".csv")
+        if legacy.exists():
+            return legacy
+    return preferred
+
+
+def read_data(path: Path, columns: list[str] | None = None) -> pd.DataFrame:
+    """Read an intermediate file written by write_data, optionally only some columns
+
+    Requested columns that are not in the file are skipped, so callers can
+    validate the result and report what is missing.
+    """
+    if columns is None:
+        if path.suffix == ".parquet":
+            return pd.read_parquet(path)
+        return pd.read_csv(path, parse_dates=["timestamp_utc"])
+
+    wanted = set(columns)
+    if path.suffix == ".parquet":
+        return pd.read_parquet(path, columns=[c for c in pq.read_schema(path).names if c in wanted])
+    return pd.read_csv(path, parse_dates=["timestamp_utc"], usecols=lambda c: c in wanted)
+
+
+def read_messages(path: Path) -> pd.DataFrame:
+    """Read the raw Telegram messages CSV with explicit dtypes and UTC timestamps"""
+    if pa is None:
+        return pd.read_csv(path, dtype=MESSAGE_DTYPES, parse_dates=["timestamp_utc"], date_format="ISO8601")
+    return pd.read_csv(path, engine="pyarrow", dtype=MESSAGE_DTYPES, parse_dates=["timestamp_utc"])
+
+
+def write_data(df: pd.DataFrame, path: Path) -> None:
+    """Write an intermediate file as Parquet or CSV depending on its extension"""
+    if path.suffix == ".parquet":
+        df.to_parquet(path, engine="pyarrow", compression="zstd", index=False)
+    else:
+        write_csv(df, path)
+
+
+def write_csv(df: pd.DataFrame, path: Path, append: bool = False) -> None:
+    """Write a DataFrame to CSV without its index, using pyarrow's C++ writer when available
+
+    With append=True rows are added to an existing file and the header is only
+    written when the file is new or empty.
+    """
+    header = not (append and path.exists() and path.stat().st_size > 0)
+    if pacsv is None:
+        df.to_csv(path, index=False, mode="a" if append else "w", header=header)
+        return
+
+    table = pa.Table.from_pandas(df, preserve_index=False)
+    i = table.schema.get_field_index("timestamp_utc")
+    if i >= 0 and pa.types.is_timestamp(table.schema.field(i).type):
+        table = table.set_column(i, "timestamp_utc", table.column(i).cast(pa.timestamp("ns", "UTC")))
+    options = pacsv.WriteOptions(include_header=header, batch_size=8192)
+    if append:
+        with open(path, "ab") as f:
+            pacsv.write_csv(table, f, write_options=options)
+    else:
+        pacsv.write_csv(table, str(path), write_options=options)
@@ -1,6 +1,7 @@
 from telethon import TelegramClient
+from telethon.sessions import Session
 
-def make_client(api_id: int, api_hash: str, session_path: str) -> TelegramClient:
+def make_client(api_id: int, api_hash: str, session_path: str | Session) -> TelegramClient:
     """Create a Telegram client with proper error handling"""
     if not api_id or not api_hash:
         raise ValueError("API ID and API Hash are required")
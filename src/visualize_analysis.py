@@ -9,20 +9,42 @@ import sys
 from pathlib import Path
 import pandas as pd
 import numpy as np
+import matplotlib
+matplotlib.use("Agg")  # render straight to files; no GUI backend needed
 import matplotlib.pyplot as plt
 import seaborn as sns
 from datetime import datetime
+from utils.data_io import find_data, read_data, read_messages
+
+def aggregate_messages(msg_path):
+    """Parse raw messages into hourly long/short liquidation totals"""
+    from parse_aggregate import extract_liquidations, aggregate_by_side
+    
+    msg_df = read_messages(msg_path)
+    print(f"📊 Loaded {len(msg_df)} messages")
+    
+    liq_df = extract_liquidations(msg_df)
+    btc_liq = liq_df[liq_df["text"].str.contains("BTC", case=False, regex=False, na=False)]
+    
+    if len(btc_liq) == 0:
+        print("⚠️  No BTC liquidations found, using all liquidations")
+        btc_liq = liq_df
+    
+    n_long = int((btc_liq["side"] == "long").sum())
+    print(f"📊 Found {len(btc_liq)} liquidations ({n_long} long, {len(btc_liq) - n_long} short)")
+    
+    return aggregate_by_side(btc_liq, "1H")
 
 def load_and_process_data():
     """Load and merge price and liquidation data"""
     
     # Load price data
-    price_path = Path("data/raw/btc_price.csv")
+    price_path = find_data(Path("data/raw/btc_price"))
     if not price_path.exists():
         print("❌ Price data not found. Run binance_fetch_price.py first.")
         return None
     
-    price_df = pd.read_csv(price_path, parse_dates=["timestamp_utc"])
+    price_df = read_data(price_path)
     print(f"📊 Loaded {len(price_df)} price records")
     
     # Load messages
@@ -31,58 +53,41 @@ def load_and_process_data():
         print("❌ Message data not found. Run fetch_telegram.py first.")
         return None
     
-    msg_df = pd.read_csv(msg_path, parse_dates=["timestamp_utc"])
-    print(f"📊 Loaded {len(msg_df)} messages")
-    
-    # Parse liquidations
-    from parse_aggregate import parse_row
-    
-    parsed = msg_df["text"].apply(parse_row)
-    msg_df["side"] = parsed.apply(lambda x: x[0])
-    msg_df["amount_usd"] = parsed.apply(lambda x: x[1])
-    
-    # Filter valid liquidations
-    liq_df = msg_df.dropna(subset=["side", "amount_usd"]).copy()
-    btc_liq = liq_df[liq_df["text"].str.contains("BTC", case=False, na=False)]
-    
-    if len(btc_liq) == 0:
-        print("⚠️  No BTC liquidations found, using all liquidations")
-        btc_liq = liq_df
-    
-    print(f"📊 Found {len(btc_liq)} liquidations ({len(btc_liq[btc_liq['side']=='long'])} long, {len(btc_liq[btc_liq['side']=='short'])} short)")
-    
-    # Aggregate by hour
-    btc_liq = btc_liq.set_index("timestamp_utc").sort_index()
-    
-    agg_data = pd.DataFrame({
-        "long_liq_usd": btc_liq[btc_liq["side"] == "long"].resample("1H")["amount_usd"].sum(),
-        "short_liq_usd": btc_liq[btc_liq["side"] == "short"].resample("1H")["amount_usd"].sum(),
-        "long_count": btc_liq[btc_liq["side"] == "long"].resample("1H")["side"].count(),
-        "short_count": btc_liq[btc_liq["side"] == "short"].resample("1H")["side"].count(),
-    }).fillna(0.0).reset_index()
-    
-    # Merge with price data
-    from pandas import merge_asof
-    
-    dataset = merge_asof(
-        agg_data.sort_values("timestamp_utc"),
-        price_df[["timestamp_utc", "close", "volume"]].sort_values("timestamp_utc"),
-        on="timestamp_utc",
-        direction="nearest",
-        tolerance=pd.Timedelta(minutes=30)
+    # parse_aggregate.py already writes the hourly aggregate; reuse it unless the messages are newer
+    agg_path = find_data(Path("data/processed/liqs_1H"))
+    if agg_path.exists() and agg_path.stat().st_mtime > msg_path.stat().st_mtime:
+        agg_data = read_data(agg_path)
+        print(f"📊 Loaded {len(agg_data)} hourly liquidation rows from {agg_path}")
+    else:
+        agg_data = aggregate_messages(msg_path)
+    
+    # Narrow what the summary does not print to the dollar; liquidation USD stays float64
+    # because its totals are printed exactly
+    agg_data = agg_data.astype({"long_count": "int32", "short_count": "int32"})
+    price_df = price_df[["timestamp_utc", "close", "volume"]].astype({"close": "float32", "volume": "float32"})
+    
+    # Match each hour to the nearest price bar within 30 minutes (binary search on the sorted index)
+    price_df = price_df.sort_values("timestamp_utc")
+    price_idx = pd.DatetimeIndex(price_df["timestamp_utc"])
+    locs = price_idx.get_indexer(agg_data["timestamp_utc"], method="nearest", tolerance=pd.Timedelta(minutes=30))
+    matched = locs >= 0
+    dataset = agg_data[matched].assign(
+        close=price_df["close"].to_numpy()[locs[matched]],
+        volume=price_df["volume"].to_numpy()[locs[matched]],
     )
     
-    dataset = dataset.dropna(subset=["close"])
-    
     if len(dataset) == 0:
         print("❌ No matching timestamps found")
         return None
     
     # Engineer features
-    dataset["net_liq_usd"] = dataset["short_liq_usd"] - dataset["long_liq_usd"]
-    dataset["total_liq_usd"] = dataset["short_liq_usd"] + dataset["long_liq_usd"]
-    dataset["price_change"] = dataset["close"].pct_change()
-    dataset["price_change_next"] = dataset["close"].pct_change().shift(-1)
+    pc = dataset["close"].pct_change()
+    dataset = dataset.assign(
+        net_liq_usd=dataset["short_liq_usd"] - dataset["long_liq_usd"],
+        total_liq_usd=dataset["short_liq_usd"] + dataset["long_liq_usd"],
+        price_change=pc,
+        price_change_next=pc.shift(-1),
+    )
     
     print(f"✅ Created dataset with {len(dataset)} records")
     return dataset
@@ -107,9 +112,9 @@ def create_timeline_chart(data, save_path):
     # 2. Liquidations
     width = pd.Timedelta(minutes=30)
     ax2.bar(data['timestamp_utc'], data['long_liq_usd'], width=width, 
-            alpha=0.7, color='#FF4444', label='Long Liquidations', edgecolor='darkred', linewidth=0.5)
+            alpha=0.7, color='#FF4444', label='Long Liquidations', edgecolor='darkred', linewidth=0.5, rasterized=True)
     ax2.bar(data['timestamp_utc'], -data['short_liq_usd'], width=width, 
-            alpha=0.7, color='#44AA44', label='Short Liquidations', edgecolor='darkgreen', linewidth=0.5)
+            alpha=0.7, color='#44AA44', label='Short Liquidations', edgecolor='darkgreen', linewidth=0.5, rasterized=True)
     
     ax2.axhline(y=0, color='black', linestyle='-', alpha=0.5, linewidth=1)
     ax2.set_ylabel('Liquidation Volume ($)', fontsize=12)
@@ -118,9 +123,9 @@ def create_timeline_chart(data, save_path):
     ax2.yaxis.set_major_formatter(plt.FuncFormatter(lambda x, p: f'${x/1e6:.1f}M' if abs(x) >= 1e6 else f'${x/1e3:.0f}K'))
     
     # 3. Net Liquidations
-    colors = ['#44AA44' if x > 0 else '#FF4444' for x in data['net_liq_usd']]
+    colors = np.where(data['net_liq_usd'].to_numpy() > 0, '#44AA44', '#FF4444')
     ax3.bar(data['timestamp_utc'], data['net_liq_usd'], width=width, 
-            alpha=0.7, color=colors, edgecolor='black', linewidth=0.5)
+            alpha=0.7, color=colors, edgecolor='black', linewidth=0.5, rasterized=True)
     
     ax3.axhline(y=0, color='black', linestyle='-', alpha=0.8, linewidth=1)
     ax3.set_ylabel('Net Liquidations ($)\n(Short - Long)', fontsize=12)
@@ -128,10 +133,10 @@ def create_timeline_chart(data, save_path):
     ax3.grid(True, alpha=0.3)
     ax3.yaxis.set_major_formatter(plt.FuncFormatter(lambda x, p: f'${x/1e6:.1f}M' if abs(x) >= 1e6 else f'${x/1e3:.0f}K'))
     
-    plt.tight_layout()
     plt.xticks(rotation=45)
-    plt.savefig(save_path, dpi=300, bbox_inches='tight')
-    plt.show()
+    plt.tight_layout()
+    fig.savefig(save_path, dpi=150)
+    plt.close(fig)
     print(f"💾 Saved timeline chart: {save_path}")
 
 def create_correlation_chart(data, save_path):
@@ -171,7 +176,7 @@ def create_correlation_chart(data, save_path):
     if len(valid_data) > 0:
         scatter = ax2.scatter(valid_data['net_liq_usd'], valid_data['price_change_next']*100, 
                              c=valid_data['total_liq_usd'], cmap='viridis', alpha=0.7, s=60, 
-                             edgecolors='black', linewidth=0.5)
+                             edgecolors='black', linewidth=0.5, rasterized=True)
         ax2.set_xlabel('Net Liquidations ($)')
         ax2.set_ylabel('Next Price Change (%)')
         ax2.set_title('Net Liquidations vs Future Price Movement', fontweight='bold')
@@ -194,9 +199,10 @@ def create_correlation_chart(data, save_path):
     
     # 4. Cumulative liquidations
     data_sorted = data.sort_values('timestamp_utc')
-    ax4.plot(data_sorted['timestamp_utc'], data_sorted['long_liq_usd'].cumsum(), 
+    cum = data_sorted[['long_liq_usd', 'short_liq_usd']].cumsum()
+    ax4.plot(data_sorted['timestamp_utc'], cum['long_liq_usd'], 
              color='#FF4444', linewidth=2, label='Cumulative Long')
-    ax4.plot(data_sorted['timestamp_utc'], data_sorted['short_liq_usd'].cumsum(), 
+    ax4.plot(data_sorted['timestamp_utc'], cum['short_liq_usd'], 
              color='#44AA44', linewidth=2, label='Cumulative Short')
     
     ax4.set_xlabel('Time (UTC)')
@@ -208,8 +214,8 @@ def create_correlation_chart(data, save_path):
     ax4.yaxis.set_major_formatter(plt.FuncFormatter(lambda x, p: f'${x/1e6:.1f}M' if x >= 1e6 else f'${x/1e3:.0f}K'))
     
     plt.tight_layout()
-    plt.savefig(save_path, dpi=300, bbox_inches='tight')
-    plt.show()
+    fig.savefig(save_path, dpi=150)
+    plt.close(fig)
     print(f"💾 Saved correlation chart: {save_path}")
 
 def print_summary(data):
@@ -4,84 +4,277 @@ Simple Telegram connectivity test
 """
 
 import os
+import sys
+import json
+import base64
 import asyncio
+import functools
+from itertools import islice
+from dataclasses import dataclass
 from pathlib import Path
-from datetime import datetime, timezone, timedelta
 from dotenv import load_dotenv
+from telethon.crypto import AuthKey
+from telethon.errors import FloodWaitError
+from telethon.sessions import MemorySession
+from telethon.tl.functions.channels import GetFullChannelRequest
+from telethon.tl.types import InputPeerChannel
 
-load_dotenv()
+try:
+    import uvloop
+except ImportError:  # uvloop is optional; fall back to the default asyncio loop
+    uvloop = None
+
+sys.path.insert(0, 'src')
+from utils.telethon_client import make_client
+
+ENV_KEYS = (
+    "TELEGRAM_API_ID", "TELEGRAM_API_HASH", "TELEGRAM_SESSION",
+    "TELEGRAM_GROUP_ID", "TELEGRAM_ACCESS_HASH",
+)
+
+# Skip reading .env only when every setting is already in the environment (e.g. CI)
+if not all(key in os.environ for key in ENV_KEYS):
+    load_dotenv()
+
+def _env_int(name: str, default: int | None = None) -> int | None:
+    """Integer env var; default when unset, None when it is not a number (e.g. a template placeholder)"""
+    value = os.getenv(name, "").strip()
+    if not value:
+        return default
+    try:
+        return int(value)
+    except ValueError:
+        return None
+
+@dataclass(frozen=True)
+class TGConfig:
+    """Telegram settings, read from the environment once at import"""
+    api_id: int | None
+    api_hash: str
+    session: str
+    channel_id: int | None
+    access_hash: int | None
+
+CONFIG = TGConfig(
+    api_id=_env_int("TELEGRAM_API_ID"),
+    api_hash=os.getenv("TELEGRAM_API_HASH", ""),
+    session=os.getenv("TELEGRAM_SESSION", ".telegram_session"),
+    channel_id=_env_int("TELEGRAM_GROUP_ID", 1407057468),
+    access_hash=_env_int("TELEGRAM_ACCESS_HASH"),
+)
+
+# With a known access hash the peer needs no lookup at all
+PEER = (
+    InputPeerChannel(CONFIG.channel_id, CONFIG.access_hash)
+    if CONFIG.channel_id is not None and CONFIG.access_hash is not None else None
+)
+
+CHANNEL_CACHE = Path(".channel_cache")
+AUTH_KEY_CACHE = Path(".auth_key.json")
+
+# ASCII-only lowercasing; "liquidated" is plain ASCII so no Unicode case folding is needed
+LOWER_TABLE = bytes.maketrans(b"ABCDEFGHIJKLMNOPQRSTUVWXYZ", b"abcdefghijklmnopqrstuvwxyz")
+MAX_SAMPLES = 3
+
+# Joined once at import; only the status fields are filled in per call
+_MISSING_TMPL = "\n".join((
+    "❌ Missing credentials:",
+    "   API_ID: {api_id}",
+    "   API_HASH: {api_hash}",
+    "   GROUP_ID: {group_id}",
+    "\n💡 Add these to your .env file:",
+    "   TELEGRAM_API_ID=your_api_id",
+    "   TELEGRAM_API_HASH=your_api_hash",
+    "   TELEGRAM_GROUP_ID=numeric_channel_id (optional)",
+)) + "\n"
+
+_CLIENT = None
+_SEM = asyncio.Semaphore(2)  # caps concurrent fetches when the test is called in a loop
+
+@functools.lru_cache(maxsize=4096)
+def _is_liq(text: str) -> bool:
+    """True if text contains "liquidated" in any ASCII case (memoized; bot messages repeat)"""
+    return b"liquidated" in text.encode("utf-8", "ignore").translate(LOWER_TABLE)
+
+def _read_cache(path: Path) -> dict | None:
+    """JSON cache contents, or None when the file is missing or unreadable"""
+    try:
+        with open(path, encoding="utf-8") as f:
+            data = json.load(f)
+    except (OSError, ValueError):
+        return None
+    return data if isinstance(data, dict) else None
+
+def _cached_channel():
+    """(channel id, access hash, title) from CHANNEL_CACHE if it was written for the configured channel"""
+    cached = _read_cache(CHANNEL_CACHE)
+    if cached is None or cached.get("for") != CONFIG.channel_id:
+        return None
+    try:
+        return int(cached["id"]), int(cached["access_hash"]), str(cached["title"])
+    except (KeyError, TypeError, ValueError):
+        return None
+
+def _load_session():
+    """
+    (session, cached key): a MemorySession primed from the cached auth key, or
+    the SQLite session path and None. A MemorySession has no entity table, so it
+    is only used when the channel peer is cached too and the key was saved for
+    the configured session.
+    """
+    if _cached_channel() is None:
+        return CONFIG.session, None
+    cached = _read_cache(AUTH_KEY_CACHE)
+    if cached is None or cached.get("session") != CONFIG.session:
+        return CONFIG.session, None
+    try:
+        key = base64.b64decode(cached["key"], validate=True)
+        dc = (int(cached["dc_id"]), str(cached["server_address"]), int(cached["port"]))
+    except (KeyError, TypeError, ValueError):
+        return CONFIG.session, None
+    session = MemorySession()
+    session.set_dc(*dc)
+    session.auth_key = AuthKey(key)
+    return session, key
+
+def _save_auth_key(client):
+    """Cache the account auth key for CONFIG.session, readable by the owner only"""
+    session = client.session
+    fd = os.open(AUTH_KEY_CACHE, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600)
+    with os.fdopen(fd, "w", encoding="utf-8") as f:
+        json.dump({
+            "session": CONFIG.session,
+            "dc_id": session.dc_id,
+            "server_address": session.server_address,
+            "port": session.port,
+            "key": base64.b64encode(session.auth_key.key).decode("ascii"),
+        }, f)
+
+async def get_client():
+    """Return the shared authorized client, creating it on first use"""
+    global _CLIENT
+    if _CLIENT is None:
+        session, cached_key = _load_session()
+        _CLIENT = make_client(CONFIG.api_id, CONFIG.api_hash, session)
+        _CLIENT.flood_sleep_threshold = 0  # raise FloodWaitError instead of sleeping it out
+        await _CLIENT.start()
+        # start() may have logged in again (revoked key, DC migration); keep the cache current
+        auth_key = _CLIENT.session.auth_key
+        if auth_key is not None and auth_key.key != cached_key:
+            _save_auth_key(_CLIENT)
+    elif not _CLIENT.is_connected():
+        await _CLIENT.connect()
+    return _CLIENT
+
+async def get_channel(client):
+    """Return (input peer, title) for the configured channel, resolving it over the network only once"""
+    cached = _cached_channel()
+    if cached is not None:
+        channel_id, access_hash, title = cached
+        return InputPeerChannel(channel_id, access_hash), title
+    
+    channel = await client.get_entity(CONFIG.channel_id)
+    with open(CHANNEL_CACHE, "w", encoding="utf-8") as f:
+        json.dump({
+            "for": CONFIG.channel_id,
+            "id": channel.id,
+            "access_hash": channel.access_hash,
+            "title": channel.title,
+        }, f)
+    return InputPeerChannel(channel.id, channel.access_hash), channel.title
 
 async def test_telegram():
     """Test Telegram connection and fetch a few messages"""
     
     try:
-        # Add src to path
-        import sys
-        sys.path.append('src')
-        from utils.telethon_client import make_client
-        
-        API_ID = int(os.getenv("TELEGRAM_API_ID", "0"))
-        API_HASH = os.getenv("TELEGRAM_API_HASH", "")
-        SESSION = os.getenv("TELEGRAM_SESSION", ".telegram_session")
-        CHANNEL_ID = int(os.getenv("TELEGRAM_GROUP_ID", "1407057468"))
-        
         print("🔧 TELEGRAM CONNECTION TEST")
         print("=" * 40)
         
-        if not API_ID or not API_HASH:
-            print("❌ Missing credentials:")
-            print(f"   API_ID: {'✅ Set' if API_ID else '❌ Missing'}")
-            print(f"   API_HASH: {'✅ Set' if API_HASH else '❌ Missing'}")
-            print("\\n💡 Add these to your .env file:")
-            print("   TELEGRAM_API_ID=your_api_id")
-            print("   TELEGRAM_API_HASH=your_api_hash")
+        # Unparseable numbers were read as missing, so they are reported here too
+        if not CONFIG.api_id or not CONFIG.api_hash or CONFIG.channel_id is None:
+            status = {False: "❌ Missing", True: "✅ Set"}
+            sys.stdout.write(_MISSING_TMPL.format_map({
+                "api_id": status[bool(CONFIG.api_id)],
+                "api_hash": status[bool(CONFIG.api_hash)],
+                "group_id": status[CONFIG.channel_id is not None],
+            }))
             return False
         
         print(f"✅ Credentials found")
-        print(f"📺 Target Channel ID: {CHANNEL_ID}")
+        print(f"📺 Target Channel ID: {CONFIG.channel_id}")
         
-        async with make_client(API_ID, API_HASH, SESSION) as client:
-            print("🔄 Connecting to Telegram...")
-            
-            # Get channel info
-            channel = await client.get_entity(CHANNEL_ID)
-            print(f"✅ Connected to: {channel.title}")
-            print(f"📊 Subscribers: {getattr(channel, 'participants_count', 'Unknown')}")
-            
-            # Fetch a few recent messages
-            print("🔄 Fetching recent messages...")
-            count = 0
-            liquidation_count = 0
-            
-            async for message in client.iter_messages(channel, limit=100):
-                count += 1
-                if message.text and "liquidated" in message.text.lower():
-                    liquidation_count += 1
-                    if liquidation_count <= 3:  # Show first 3 liquidations
-                        print(f"📝 Sample {liquidation_count}: {message.text[:80]}...")
-            
-            print(f"\\n📊 Results:")
-            print(f"   Total messages checked: {count}")
-            print(f"   Liquidation messages found: {liquidation_count}")
+        print("🔄 Connecting to Telegram...")
+        client = await get_client()
+        
+        # Channel title and subscribers are cosmetic; non-interactive runs skip resolving them
+        interactive = PEER is None or sys.stdout.isatty()
+        if interactive:
+            channel, title = await get_channel(client)
+            print(f"✅ Connected to: {title}")
+        else:
+            channel = PEER
+        
+        # Let Telegram do the search; only a few matching messages are downloaded
+        print("🔄 Searching liquidation messages...")
+        try:
+            async with _SEM:
+                requests = [
+                    client.get_messages(channel, limit=MAX_SAMPLES, search="liquidated"),
+                    client.get_messages(channel, limit=0),
+                ]
+                if interactive:
+                    # get_entity leaves participants_count unset; the full channel has it
+                    requests.append(client(GetFullChannelRequest(channel)))
+                messages, everything, *full = await asyncio.gather(*requests)
+        except FloodWaitError as e:
+            print(f"⏳ Rate limited by Telegram; retry in {e.seconds}s")
+            return False
+        total = everything.total
+        if full:
+            print(f"📊 Subscribers: {full[0].full_chat.participants_count}")
+        
+        # Server-side search matches words; only show samples that contain the substring
+        # .text is a property on Telethon messages, so read it once per message
+        matches = (text for text in (m.text for m in messages) if text and _is_liq(text))
+        samples = list(islice(matches, MAX_SAMPLES))
+        lines = [f"📝 Sample {i}: {text[:80]}..." for i, text in enumerate(samples, 1)]  # written in one go below
+        
+        # The count and the verdict both come from the server's search total
+        found = messages.total
+        success = found > 0
+        lines += [
+            "\n📊 Results:",
+            f"   Total messages in channel: {total}",
+            f"   Liquidation messages found: {found}",
+            "✅ SUCCESS: Can fetch liquidation data!" if success
+            else "⚠️  No liquidation messages found in the channel",
+        ]
+        sys.stdout.write("\n".join(lines) + "\n")
+        return success
             
-            if liquidation_count > 0:
-                print("✅ SUCCESS: Can fetch liquidation data!")
-                return True
-            else:
-                print("⚠️  No liquidation messages found in recent messages")
-                return False
-                
     except Exception as e:
-        print(f"❌ Connection failed: {e}")
-        print("\\n💡 Possible solutions:")
-        print("   - Check your API credentials")
-        print("   - Make sure you're subscribed to the channel")
-        print("   - Try running: python scripts/list_telegram_groups.py")
+        sys.stdout.write("\n".join([
+            f"❌ Connection failed: {e}",
+            "\n💡 Possible solutions:",
+            "   - Check your API credentials",
+            "   - Make sure you're subscribed to the channel",
+            "   - Try running: python scripts/list_telegram_groups.py",
+        ]) + "\n")
         return False
 
+async def main():
+    """Run the test once and close the shared client"""
+    try:
+        return await test_telegram()
+    finally:
+        if _CLIENT is not None:
+            await _CLIENT.disconnect()
+
 if __name__ == "__main__":
-    success = asyncio.run(test_telegram())
+    if uvloop is not None:
+        uvloop.install()
+    success = asyncio.run(main())
     if success:
-        print("\\n🎉 Ready to run the notebook!")
+        print("\n🎉 Ready to run the notebook!")
     else:
-        print("\\n🔧 Fix the issues above before running the notebook")
\ No newline at end of file
+        print("\n🔧 Fix the issues above before running the notebook")
\ No newline at end of file